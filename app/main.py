@@ -1,12 +1,19 @@
+import os
+import json
+import errno
+import time
 import uuid
+import asyncio
 from pathlib import Path
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import JSONResponse, FileResponse, HTMLResponse
+from fastapi.responses import ORJSONResponse, FileResponse, HTMLResponse
+from starlette.concurrency import run_in_threadpool
 
-from app.services.translator import translate_text
+from app.services.translator import cache_key, load_tokenizer, translate_text
 from app.services.file_utils import (
     detect_type,
     extract_text_from_pdf,
@@ -21,16 +28,79 @@ from app.services.file_utils import (
     save_xlsx_from_flat,
 )
 from app.services.ocr import extract_text_from_image
+from app.services._azure import http_client
 
 # Paths
 BASE_DIR = Path(__file__).resolve().parent
 STATIC_DIR = BASE_DIR / "static"
-OUTPUT_DIR = STATIC_DIR / "outputs"
+# Outputs live on tmpfs when available (RAM-backed, shared by all workers on the host).
+# OUTPUT_DIR overrides the location. tmpfs can be small (Docker defaults /dev/shm to 64 MB),
+# so writes that hit ENOSPC fall back to the on-disk FALLBACK_OUTPUT_DIR. Both are kept
+# outside STATIC_DIR so files are only reachable through /download.
+FALLBACK_OUTPUT_DIR = BASE_DIR / "outputs"
+if os.environ.get("OUTPUT_DIR"):
+    OUTPUT_DIR = Path(os.environ["OUTPUT_DIR"])
+elif Path("/dev/shm").exists():
+    OUTPUT_DIR = Path("/dev/shm/translator")
+else:
+    OUTPUT_DIR = FALLBACK_OUTPUT_DIR
+OUTPUT_DIRS = (OUTPUT_DIR,) if OUTPUT_DIR == FALLBACK_OUTPUT_DIR else (OUTPUT_DIR, FALLBACK_OUTPUT_DIR)
 TEMPLATES_DIR = BASE_DIR / "templates"
 
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+# Output files older than OUTPUT_TTL_SECONDS are deleted by a sweep every SWEEP_INTERVAL_SECONDS
+OUTPUT_TTL_SECONDS = 60 * 60
+SWEEP_INTERVAL_SECONDS = 10 * 60
 
-app = FastAPI(title="Azure OpenAI Translator", version="1.0.0")
+for _dir in OUTPUT_DIRS:
+    _dir.mkdir(parents=True, exist_ok=True)
+
+# Uploads larger than this are rejected from the Content-Length header before the body is read
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_MB", "25")) * 1024 * 1024
+
+# Download formats offered per input type (first is the primary format).
+# Files are generated on first download from the job's .meta.json sidecar.
+OUTPUT_FORMATS: dict[str | None, tuple[str, ...]] = {
+    "xlsx": ("xlsx", "csv"),
+    "csv": ("csv", "xlsx"),
+    "pdf": ("pdf", "docx", "txt"),
+    "docx": ("docx", "pdf", "txt"),
+    "txt": ("txt",),  # Spec: TXT -> TXT only
+    None: ("txt",),  # pasted text
+}
+# Images/unknown — provide useful text outputs
+DEFAULT_OUTPUT_FORMATS = ("txt", "docx", "pdf")
+
+SAVERS = {
+    "txt": save_txt,
+    "docx": save_docx,
+    "pdf": save_pdf,
+    "csv": save_csv_from_flat,
+    "xlsx": save_xlsx_from_flat,
+}
+MEDIA_TYPES = {
+    "txt": "text/plain",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "pdf": "application/pdf",
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+class ApiGZipMiddleware:
+    """GZip only /api/* responses (the translate JSON). Downloads are served untouched:
+    DOCX/XLSX are already zip archives, and FileResponse can then use sendfile()."""
+
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith("/api/"):
+            await self.gzip(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+
+app = FastAPI(title="Azure OpenAI Translator", version="1.0.0", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -39,11 +109,95 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Translated text compresses well; small responses are not worth the CPU
+app.add_middleware(ApiGZipMiddleware, minimum_size=1024)
 
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 templates = Jinja2Templates(directory=TEMPLATES_DIR)
 
 
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    # Runs before FastAPI parses the multipart body, so oversized uploads are never buffered
+    if request.method == "POST" and request.url.path == "/api/translate":
+        length = request.headers.get("content-length")
+        if length and length.isdigit() and int(length) > MAX_UPLOAD_BYTES:
+            return ORJSONResponse(
+                status_code=413,
+                content={"detail": f"Upload too large. Maximum size is {MAX_UPLOAD_BYTES // (1024 * 1024)} MB."},
+            )
+    return await call_next(request)
+
+
+def _find_output(filename: str) -> Path | None:
+    for out_dir in OUTPUT_DIRS:
+        path = out_dir / filename
+        if path.exists():
+            return path
+    return None
+
+
+def _write_output(filename: str, writer) -> Path:
+    """Create filename via writer(path) in the first output dir with free space.
+    Writes go to a temp name and are renamed, so readers never see a partial file."""
+    for i, out_dir in enumerate(OUTPUT_DIRS):
+        path = out_dir / filename
+        tmp_path = out_dir / f"{filename}.{uuid.uuid4().hex}.tmp"
+        try:
+            writer(tmp_path)
+            os.replace(tmp_path, path)
+            return path
+        except OSError as e:
+            tmp_path.unlink(missing_ok=True)
+            if e.errno != errno.ENOSPC or i == len(OUTPUT_DIRS) - 1:
+                raise
+
+
+def _sweep_outputs() -> None:
+    cutoff = time.time() - OUTPUT_TTL_SECONDS
+    for out_dir in OUTPUT_DIRS:
+        for path in out_dir.iterdir():
+            try:
+                if path.is_file() and path.name != ".gitkeep" and path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except FileNotFoundError:
+                pass  # removed concurrently by another worker's sweep
+
+
+async def _sweep_loop() -> None:
+    while True:
+        try:
+            await run_in_threadpool(_sweep_outputs)
+        except Exception:
+            pass  # a failed sweep is retried on the next interval
+        await asyncio.sleep(SWEEP_INTERVAL_SECONDS)
+
+
+_sweeper: asyncio.Task | None = None
+_tokenizer_loader: asyncio.Task | None = None
+
+
+@app.on_event("startup")
+async def start_output_sweeper():
+    global _sweeper
+    _sweeper = asyncio.create_task(_sweep_loop())
+
+
+@app.on_event("startup")
+async def warm_tokenizer():
+    # Not awaited: tiktoken's first download has no timeout, and until it finishes
+    # chunking falls back to a character estimate instead of blocking requests
+    global _tokenizer_loader
+    _tokenizer_loader = asyncio.create_task(run_in_threadpool(load_tokenizer))
+
+
+@app.on_event("shutdown")
+async def close_http_client():
+    if _sweeper is not None:
+        _sweeper.cancel()
+    await http_client.aclose()
+
+
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
@@ -69,21 +223,22 @@ async def api_translate(
         filename = file.filename or "upload"
         file_ext = Path(filename).suffix.lower()
         file_kind = detect_type(file_ext)
-        content = await file.read()
 
+        # The upload is already spooled to a temp file by the multipart parser;
+        # binary formats read straight from that handle instead of a bytes copy.
         if file_kind == "pdf":
-            source_text = extract_text_from_pdf(content)
+            source_text = extract_text_from_pdf(file.file)
         elif file_kind == "docx":
-            source_text = extract_text_from_docx(content)
+            source_text = extract_text_from_docx(file.file)
         elif file_kind == "txt":
-            source_text = extract_text_from_txt(content)
+            source_text = extract_text_from_txt(await file.read())
         elif file_kind == "csv":
-            source_text = extract_text_from_csv(content)
+            source_text = extract_text_from_csv(await file.read())
         elif file_kind == "xlsx":
-            source_text = extract_text_from_xlsx(content)
+            source_text = extract_text_from_xlsx(file.file)
         elif file_kind == "image":
             # GPT-4o OCR (no Computer Vision)
-            source_text = extract_text_from_image(content)
+            source_text = await extract_text_from_image(await file.read())
         else:
             raise HTTPException(
                 status_code=400,
@@ -97,106 +252,53 @@ async def api_translate(
 
     # Translate via Azure OpenAI GPT-4o
     try:
-        translated = translate_text(source_text)
+        translated = await translate_text(source_text)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Translation failed: {e}")
 
-    # Persist outputs with a unique job id — dynamic per input type
+    # Persist the translation with a unique job id; output files are built lazily on download
     job_id = str(uuid.uuid4())
-    downloads: dict[str, str] = {}
+    formats = OUTPUT_FORMATS.get(file_kind, DEFAULT_OUTPUT_FORMATS)
 
+    meta = json.dumps({"file_kind": file_kind, "translated": translated})
     try:
-        if file_kind == "xlsx":
-            xlsx_path = OUTPUT_DIR / f"{job_id}.xlsx"
-            csv_path = OUTPUT_DIR / f"{job_id}.csv"
-            save_xlsx_from_flat(translated, xlsx_path)
-            save_csv_from_flat(translated, csv_path)
-            downloads = {"xlsx": f"/download/{job_id}/xlsx", "csv": f"/download/{job_id}/csv"}
-
-        elif file_kind == "csv":
-            csv_path = OUTPUT_DIR / f"{job_id}.csv"
-            xlsx_path = OUTPUT_DIR / f"{job_id}.xlsx"
-            save_csv_from_flat(translated, csv_path)
-            save_xlsx_from_flat(translated, xlsx_path)
-            downloads = {"csv": f"/download/{job_id}/csv", "xlsx": f"/download/{job_id}/xlsx"}
-
-        elif file_kind == "pdf":
-            pdf_path = OUTPUT_DIR / f"{job_id}.pdf"
-            docx_path = OUTPUT_DIR / f"{job_id}.docx"
-            txt_path = OUTPUT_DIR / f"{job_id}.txt"
-            save_pdf(translated, pdf_path)
-            save_docx(translated, docx_path)
-            save_txt(translated, txt_path)
-            downloads = {
-                "pdf": f"/download/{job_id}/pdf",
-                "docx": f"/download/{job_id}/docx",
-                "txt": f"/download/{job_id}/txt",
-            }
-
-        elif file_kind == "docx":
-            docx_path = OUTPUT_DIR / f"{job_id}.docx"
-            pdf_path = OUTPUT_DIR / f"{job_id}.pdf"
-            txt_path = OUTPUT_DIR / f"{job_id}.txt"
-            save_docx(translated, docx_path)
-            save_pdf(translated, pdf_path)
-            save_txt(translated, txt_path)
-            downloads = {
-                "docx": f"/download/{job_id}/docx",
-                "pdf": f"/download/{job_id}/pdf",
-                "txt": f"/download/{job_id}/txt",
-            }
-
-        elif file_kind == "txt" or file_kind is None:
-            # Spec: TXT -> TXT only
-            txt_path = OUTPUT_DIR / f"{job_id}.txt"
-            save_txt(translated, txt_path)
-            downloads = {"txt": f"/download/{job_id}/txt"}
-
-        else:
-            # Images/unknown — provide useful text outputs
-            txt_path = OUTPUT_DIR / f"{job_id}.txt"
-            docx_path = OUTPUT_DIR / f"{job_id}.docx"
-            pdf_path = OUTPUT_DIR / f"{job_id}.pdf"
-            save_txt(translated, txt_path)
-            save_docx(translated, docx_path)
-            save_pdf(translated, pdf_path)
-            downloads = {
-                "txt": f"/download/{job_id}/txt",
-                "docx": f"/download/{job_id}/docx",
-                "pdf": f"/download/{job_id}/pdf",
-            }
+        _write_output(f"{job_id}.meta.json", lambda p: p.write_text(meta, encoding="utf-8"))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to generate output files: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to save translation: {e}")
+
+    downloads = {fmt: f"/download/{job_id}/{fmt}" for fmt in formats}
 
-    return JSONResponse(
+    return ORJSONResponse(
         content={
             "job_id": job_id,
             "translated_text": translated,
             "downloads": downloads,
-        }
+        },
+        headers={"ETag": f'"{cache_key(source_text)}"'},
     )
 
 
 @app.get("/download/{job_id}/{fmt}")
 async def download(job_id: str, fmt: str):
     fmt = fmt.lower()
-    path_map = {
-        "txt": OUTPUT_DIR / f"{job_id}.txt",
-        "docx": OUTPUT_DIR / f"{job_id}.docx",
-        "pdf": OUTPUT_DIR / f"{job_id}.pdf",
-        "csv": OUTPUT_DIR / f"{job_id}.csv",
-        "xlsx": OUTPUT_DIR / f"{job_id}.xlsx",
-    }
-    if fmt not in path_map:
+    if fmt not in MEDIA_TYPES:
         raise HTTPException(status_code=400, detail="Unsupported format. Use txt, docx, pdf, csv, or xlsx.")
-    path = path_map[fmt]
-    if not path.exists():
+    try:
+        uuid.UUID(job_id)
+    except ValueError:
         raise HTTPException(status_code=404, detail="File not found or expired.")
-    media = {
-        "txt": "text/plain",
-        "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        "pdf": "application/pdf",
-        "csv": "text/csv",
-        "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    }[fmt]
-    return FileResponse(path, media_type=media, filename=path.name)
+
+    path = _find_output(f"{job_id}.{fmt}")
+    if path is None:
+        meta_path = _find_output(f"{job_id}.meta.json")
+        if meta_path is None:
+            raise HTTPException(status_code=404, detail="File not found or expired.")
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if fmt not in OUTPUT_FORMATS.get(meta["file_kind"], DEFAULT_OUTPUT_FORMATS):
+            raise HTTPException(status_code=404, detail=f"{fmt.upper()} output is not available for this job.")
+        save = SAVERS[fmt]
+        try:
+            path = await run_in_threadpool(_write_output, f"{job_id}.{fmt}", lambda p: save(meta["translated"], p))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to generate output file: {e}")
+    return FileResponse(path, media_type=MEDIA_TYPES[fmt], filename=path.name)
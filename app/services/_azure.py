@@ -0,0 +1,11 @@
+import httpx
+
+# One HTTP connection pool shared by every Azure OpenAI client in the process
+# (translation and OCR), so they reuse the same keep-alive TLS connections.
+# HTTP/2 multiplexes concurrent chunk requests over a single connection.
+# The read timeout matches the openai SDK default; long chunks take minutes to translate.
+http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=40),
+    timeout=httpx.Timeout(600.0, connect=10.0),
+)
@@ -1,69 +1,114 @@
+from functools import lru_cache
 from pathlib import Path
-from typing import Literal
-from io import BytesIO
+from typing import BinaryIO, Literal
 
 from docx import Document
-from PyPDF2 import PdfReader
+import fitz  # PyMuPDF
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from reportlab.pdfbase.pdfmetrics import stringWidth
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, ListFlowable, ListItem, PageBreak, Table, TableStyle, LongTable
+from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.units import cm
 from reportlab.lib import colors
 
 import re
 
-_BOLD_RE = re.compile(r"\*\*([^*]+)\*\*")
+# Module-level patterns, compiled once.
+# _ITALIC_RE runs after the **bold** scan (see _inline_runs). The (?=(...))\1 construct
+# emulates an atomic group (possessive quantifiers need Python 3.11), so an unclosed
+# marker fails in one step instead of backtracking through the whole run of text.
+_ITALIC_RE = re.compile(r"(?<!\*)\*(?=([^*]+))\1\*(?!\*)")
+_HEADING_RE = re.compile(r"^#{1,3}\s+(.+)$")
+_LIST_PREFIX_RE = re.compile(r"^(?:\d+\.|[-*])\s*")
+_NUMBERED_RE = re.compile(r"\d+\.")
+_BLANK_LINE_RE = re.compile(r"\n\s*\n")
+# Sheet headers always start with '=', so callers gate on str.startswith("=") before matching
+_SHEET_RX = re.compile(r"^=+\s*Sheet:\s*(.+?)\s*=+$", re.I)
+
+def _iter_lines(text: str):
+    """Yield the lines of text one at a time (like text.split("\n") without building the list)."""
+    i = 0
+    while True:
+        j = text.find("\n", i)
+        if j < 0:
+            yield text[i:]
+            return
+        yield text[i:j]
+        i = j + 1
+
+def _iter_blocks(text: str):
+    """Yield blank-line separated blocks lazily (like _BLANK_LINE_RE.split(text))."""
+    last = 0
+    for m in _BLANK_LINE_RE.finditer(text):
+        yield text[last:m.start()]
+        last = m.end()
+    yield text[last:]
 
 def strip_markdown(text: str) -> str:
     """Remove simple markdown (currently **bold** only) for TXT export."""
-    return _BOLD_RE.sub(lambda m: m.group(1), text)
+    return "".join(seg for seg, _ in _split_bold_segments(text))
 
 def _split_bold_segments(text: str):
-    """Split a string into [(segment, is_bold), ...] by **bold** markers."""
+    """Split a string into [(segment, is_bold), ...] by **bold** markers.
+    Plain str.find scan with the same rule as the old **([^*]+)** pattern: the bold text
+    must be non-empty and star-free, otherwise the markers stay literal (e.g. a masked
+    '****' value).
+    Linear time, no backtracking.
+    """
     parts = []
-    last = 0
-    for m in _BOLD_RE.finditer(text):
-        if m.start() > last:
-            parts.append((text[last:m.start()], False))
-        parts.append((m.group(1), True))
-        last = m.end()
-    if last < len(text):
-        parts.append((text[last:], False))
+    i = 0  # start of pending plain text
+    j = text.find("**")
+    while j >= 0:
+        k = text.find("*", j + 2)
+        if k < 0:
+            break
+        if k > j + 2 and text.startswith("**", k):
+            if j > i:
+                parts.append((text[i:j], False))
+            parts.append((text[j + 2:k], True))
+            i = k + 2
+            j = text.find("**", i)
+        else:
+            j = text.find("**", j + 1)
+    if i < len(text):
+        parts.append((text[i:], False))
     return parts
 
 FileKind = Literal["pdf", "docx", "txt", "csv", "xlsx", "image", "unknown"]
 
+# Legacy .doc/.xls are not supported; please convert to .docx/.xlsx
+_KIND: dict[str, FileKind] = {
+    ".pdf": "pdf",
+    ".docx": "docx",
+    ".txt": "txt",
+    ".csv": "csv",
+    ".xlsx": "xlsx",
+    ".png": "image",
+    ".jpg": "image",
+    ".jpeg": "image",
+}
+
 def detect_type(ext: str) -> FileKind:
-    ext = ext.lower()
-    if ext == ".pdf":
-        return "pdf"
-    if ext in {".docx"}:  # legacy .doc not supported; please convert to .docx
-        return "docx"
-    if ext in {".txt"}:
-        return "txt"
-    if ext in {".csv"}:
-        return "csv"
-    if ext in {".xlsx"}:  # legacy .xls not supported; please convert to .xlsx
-        return "txt"
-    if ext in {".png", ".jpg", ".jpeg"}:
-        return "image"
-    return "unknown"
-
-def extract_text_from_pdf(data: bytes) -> str:
-    reader = PdfReader(BytesIO(data))
+    return _KIND.get(ext.lower(), "unknown")
+
+# Pages are extracted in-process on purpose. A process pool with 4-page tasks measured
+# 0.59 s vs 0.017 s in-process for a 29 MB, 40-page PDF: shipping the PDF to workers
+# costs far more than PyMuPDF's milliseconds per page.
+def extract_text_from_pdf(fp: BinaryIO) -> str:
+    doc = fitz.open(stream=fp.read(), filetype="pdf")
     texts = []
-    for page in reader.pages:
-        try:
-            texts.append(page.extract_text() or "")
-        except Exception:
-            pass
+    try:
+        for page in doc:
+            try:
+                texts.append(page.get_text("text") or "")
+            except Exception:
+                pass
+    finally:
+        doc.close()
     return "\n\n".join(t.strip() for t in texts if t and t.strip())
 
-def extract_text_from_docx(data: bytes) -> str:
-    f = BytesIO(data)
-    doc = Document(f)
+def extract_text_from_docx(fp: BinaryIO) -> str:
+    doc = Document(fp)
     return "\n\n".join(p.text for p in doc.paragraphs)
 
 def extract_text_from_txt(data: bytes) -> str:
@@ -111,18 +156,24 @@ def extract_text_from_csv(data: bytes) -> str:
         lines.append(" | ".join(safe).rstrip())
     return "\n".join(lines)
 
-def extract_text_from_xlsx(data: bytes) -> str:
+def extract_text_from_xlsx(fp: BinaryIO) -> str:
     """Read .xlsx and flatten each worksheet as pipe-delimited rows with sheet headers."""
     from openpyxl import load_workbook
-    wb = load_workbook(filename=BytesIO(data), data_only=True, read_only=True)
-    parts = []
-    for ws in wb.worksheets:
-        parts.append(f"===== Sheet: {ws.title} =====")
-        for row in ws.iter_rows(values_only=True):
-            cells = ["" if v is None else str(v) for v in row]
-            parts.append(" | ".join(cells).rstrip())
-        parts.append("")
-    return "\n".join(parts).strip()
+    from io import StringIO
+    wb = load_workbook(filename=fp, data_only=True, read_only=True)
+    # Write rows straight into one buffer rather than keeping a str per row alive
+    buf = StringIO()
+    try:
+        for ws in wb.worksheets:
+            buf.write(f"===== Sheet: {ws.title} =====\n")
+            for row in ws.iter_rows(values_only=True):
+                buf.write(" | ".join("" if v is None else str(v) for v in row).rstrip())
+                buf.write("\n")
+            buf.write("\n")
+    finally:
+        # read-only workbooks keep the zip archive open until closed
+        wb.close()
+    return buf.getvalue().strip()
 
 
 
@@ -132,20 +183,17 @@ def save_csv_from_flat(text: str, path: Path) -> None:
     - Splits each non-empty line on ' | '
     - Ignores sheet headers like '===== Sheet: Name =====' (content-only)
     """
-    import csv, re
-    rows = []
-    for line in text.split("\n"):
-        s = line.strip()
-        if not s:
-            continue
-        if re.match(r"^=+\s*Sheet:\s*.+?\s*=+$", s, flags=re.I):
-            # sheet header; skip in CSV
-            continue
-        cells = [c.strip() for c in line.split(" | ")]
-        rows.append(cells)
+    import csv
     with path.open("w", encoding="utf-8", newline="") as f:
         writer = csv.writer(f)
-        writer.writerows(rows)
+        for line in _iter_lines(text):
+            s = line.strip()
+            if not s:
+                continue
+            if s.startswith("=") and _SHEET_RX.match(s):
+                # sheet header; skip in CSV
+                continue
+            writer.writerow([c.strip() for c in line.split(" | ")])
 
 def save_xlsx_from_flat(text: str, path: Path) -> None:
     """Save flattened text to XLSX.
@@ -153,37 +201,242 @@ def save_xlsx_from_flat(text: str, path: Path) -> None:
     - Otherwise splits lines on ' | ' into cells
     """
     from openpyxl import Workbook
-    import re
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Sheet1"
-    first_sheet_used = False
+    # Write-only mode streams appended rows to the XML writer instead of building a cell grid
+    wb = Workbook(write_only=True)
+    ws = None
 
     def new_sheet(name: str):
-        nonlocal ws, first_sheet_used
-        if not first_sheet_used:
-            # Rename first sheet
-            ws.title = name or "Sheet1"
-            first_sheet_used = True
-        else:
-            ws = wb.create_sheet(title=name or "Sheet")
+        nonlocal ws
+        ws = wb.create_sheet(title=name or "Sheet")
 
-    for line in text.split("\n"):
+    for line in _iter_lines(text):
         s = line.strip()
         if not s:
             continue
-        m = re.match(r"^=+\s*Sheet:\s*(.+?)\s*=+$", s, flags=re.I)
+        m = _SHEET_RX.match(s) if s.startswith("=") else None
         if m:
             new_sheet(m.group(1))
             continue
+        if ws is None:
+            new_sheet("Sheet1")
         cells = [c.strip() for c in line.split(" | ")]
         ws.append(cells)
+    if ws is None:
+        # A workbook needs at least one sheet
+        new_sheet("Sheet1")
     wb.save(path)
 
 
 
+# PDF layout, computed once at import: page geometry, fonts and the sample stylesheet sizes
+_STYLES = getSampleStyleSheet()
+_PAGE_W, _PAGE_H = A4
+_MARGIN = 2*cm
+_BODY = (_STYLES["BodyText"].fontSize, 14)
+_HEADINGS = [(_STYLES[n].fontSize, _STYLES[n].leading) for n in ("Heading1", "Heading2", "Heading3")]
+_FONTS = {
+    (False, False): "Helvetica",
+    (True, False): "Helvetica-Bold",
+    (False, True): "Helvetica-Oblique",
+    (True, True): "Helvetica-BoldOblique",
+}
+_QUOTE_COLOR = colors.HexColor("#333333")
+_LIST_INDENT = 1*cm
+_CELL_HPAD, _CELL_VPAD = 6, 4
+_WORD_RE = re.compile(r"\S+|\s+")
+
+@lru_cache(maxsize=8192)
+def _text_width(text: str, font: str, size: float) -> float:
+    return stringWidth(text, font, size)
+
+def _inline_runs(s: str):
+    """Split a string into [(text, is_bold, is_italic), ...]; a "\n" run is a hard line break.
+    **bold** is matched first and *italic* second over the result (each bold span standing in
+    as non-star text), so an italic span can contain bold ones, e.g. *see the **key** note*.
+    """
+    # Pass 1: bold spans, as [start, end) offsets into `flat`, where each **X** becomes a
+    # one-character placeholder on either side of X
+    flat = []
+    bold = []
+    pos = 0
+    for seg, is_bold in _split_bold_segments(s):
+        if is_bold:
+            flat.append(f"\x00{seg}\x00")
+            bold.append((pos + 1, pos + 1 + len(seg)))
+            pos += len(seg) + 2
+        else:
+            flat.append(seg)
+            pos += len(seg)
+    flat = "".join(flat)
+
+    # Pass 2: italic spans; only star vs non-star matters to the pattern, so the
+    # placeholders cannot collide with real text
+    italic = [m.span(1) for m in _ITALIC_RE.finditer(flat)]
+
+    # Cut at every span edge; placeholders and italic markers are the one-character
+    # pieces just outside a span, and are dropped
+    drop = {a - 1 for a, _ in bold} | {b for _, b in bold} | {a - 1 for a, _ in italic} | {b for _, b in italic}
+    cuts = sorted(drop | {d + 1 for d in drop} | {0, len(flat)})
+    runs = []
+    bi = ii = 0
+    for a, b in zip(cuts, cuts[1:]):
+        if a in drop or a >= b:
+            continue
+        while bi < len(bold) and bold[bi][1] <= a:
+            bi += 1
+        while ii < len(italic) and italic[ii][1] <= a:
+            ii += 1
+        is_bold = bi < len(bold) and bold[bi][0] <= a
+        is_italic = ii < len(italic) and italic[ii][0] <= a
+        for k, line in enumerate(flat[a:b].split("\n")):
+            if k:
+                runs.append(("\n", False, False))
+            if line:
+                runs.append((line, is_bold, is_italic))
+    return runs
+
+def _wrap(runs, width: float, size: float, bold: bool = False, italic: bool = False):
+    """Greedy word-wrap of inline runs into lines of [(text, font), ...] at most `width` wide.
+    Whitespace collapses to single spaces; words wider than a line are broken by character.
+    """
+    lines = [[]]
+    x = 0.0
+
+    def put(piece: str, font: str, w: float):
+        nonlocal x
+        line = lines[-1]
+        if line and line[-1][1] == font:
+            line[-1] = (line[-1][0] + piece, font)
+        else:
+            line.append((piece, font))
+        x += w
+
+    def newline():
+        nonlocal x
+        lines.append([])
+        x = 0.0
+
+    for text, b, i in runs:
+        if text == "\n":
+            newline()
+            continue
+        font = _FONTS[(b or bold, i or italic)]
+        for word in _WORD_RE.findall(text):
+            if word.isspace():
+                if lines[-1]:
+                    put(" ", font, _text_width(" ", font, size))
+                continue
+            w = _text_width(word, font, size)
+            if x + w > width and lines[-1]:
+                newline()
+            if w <= width:
+                put(word, font, w)
+                continue
+            for ch in word:
+                cw = _text_width(ch, font, size)
+                if x + cw > width and lines[-1]:
+                    newline()
+                put(ch, font, cw)
+    return lines
+
+class _PdfCanvas:
+    """Top-down layout straight onto a ReportLab canvas, breaking pages as needed."""
+
+    def __init__(self, path: Path):
+        self.c = canvas.Canvas(str(path), pagesize=A4)
+        self.left = _MARGIN
+        self.width = _PAGE_W - 2*_MARGIN
+        self.top = _PAGE_H - _MARGIN
+        self.y = self.top
+
+    def page_break(self):
+        self.c.showPage()
+        self.y = self.top
+
+    def ensure(self, height: float):
+        # Start a new page unless the current one is still empty
+        if self.y - height < _MARGIN and self.y < self.top:
+            self.page_break()
+
+    def space(self, height: float):
+        self.y -= height
+
+    def draw_line(self, line, x: float, baseline: float, size: float):
+        for piece, font in line:
+            self.c.setFont(font, size)
+            self.c.drawString(x, baseline, piece)
+            x += _text_width(piece, font, size)
+
+    def text(self, s: str, size: float, leading: float, indent: float = 0, bold: bool = False,
+             italic: bool = False, color=colors.black, label: str | None = None):
+        lines = _wrap(_inline_runs(s), self.width - indent, size, bold, italic)
+        x = self.left + indent
+        self.c.setFillColor(color)
+        for n, line in enumerate(lines):
+            self.ensure(leading)
+            baseline = self.y - size
+            if n == 0 and label:
+                self.c.setFont(_FONTS[(False, False)], size)
+                self.c.drawRightString(x - 6, baseline, label)
+            self.draw_line(line, x, baseline, size)
+            self.y -= leading
+        self.c.setFillColor(colors.black)
+
+    def table(self, rows):
+        size, leading = _BODY[0], _BODY[0] * 1.2
+        ncols = max(len(r) for r in rows)
+        rows = [r + [""] * (ncols - len(r)) for r in rows]
+        natural = [
+            max(_text_width(r[ci], _FONTS[(ri == 0, False)], size) for ri, r in enumerate(rows)) + 2*_CELL_HPAD
+            for ci in range(ncols)
+        ]
+        total = sum(natural)
+        col_w = natural
+        if total > self.width:
+            # Columns narrower than an even share keep their width; the rest split what is left
+            fair = self.width / ncols
+            narrow = sum(w for w in natural if w <= fair)
+            scale = (self.width - narrow) / (total - narrow)
+            col_w = [w if w <= fair else w * scale for w in natural]
+        xs = [self.left]
+        for w in col_w:
+            xs.append(xs[-1] + w)
+
+        self.c.setStrokeColor(colors.grey)
+        self.c.setLineWidth(0.25)
+        ys = [self.y]
+        for ri, row in enumerate(rows):
+            cells = [
+                _wrap([(cell, False, False)], w - 2*_CELL_HPAD, size, bold=ri == 0)
+                for cell, w in zip(row, col_w)
+            ]
+            height = max(len(lines) for lines in cells) * leading + 2*_CELL_VPAD
+            if self.y - height < _MARGIN and self.y < self.top:
+                if len(ys) > 1:
+                    self.c.grid(xs, ys)
+                self.page_break()
+                self.c.setStrokeColor(colors.grey)
+                self.c.setLineWidth(0.25)
+                ys = [self.y]
+            if ri == 0:
+                self.c.setFillColor(colors.whitesmoke)
+                self.c.rect(xs[0], self.y - height, xs[-1] - xs[0], height, stroke=0, fill=1)
+                self.c.setFillColor(colors.black)
+            for lines, x in zip(cells, xs):
+                baseline = self.y - _CELL_VPAD - size
+                for line in lines:
+                    self.draw_line(line, x + _CELL_HPAD, baseline, size)
+                    baseline -= leading
+            self.y -= height
+            ys.append(self.y)
+        if len(ys) > 1:
+            self.c.grid(xs, ys)
+
+    def save(self):
+        self.c.save()
+
 def save_pdf(text: str, path: Path) -> None:
-    """Generate a nicely formatted PDF using ReportLab Platypus.
+    """Generate a nicely formatted PDF drawn directly on a ReportLab canvas (single pass).
     - Converts **bold**/*italic*
     - Headings: #, ##, ###
     - Lists: -, *, 1.
@@ -191,30 +444,6 @@ def save_pdf(text: str, path: Path) -> None:
     - Tables: lines with pipes (|) and optional '===== Sheet: Name =====' headers
     - Page breaks: a block exactly '---'
     """
-    from xml.sax.saxutils import escape as xml_escape
-    import re
-
-    styles = getSampleStyleSheet()
-    base = styles["BodyText"]
-    base.leading = 14
-    h1 = styles["Heading1"]
-    h2 = styles["Heading2"]
-    h3 = styles["Heading3"]
-    quote = ParagraphStyle("Quote", parent=base, leftIndent=1*cm, italic=True, textColor="#333333")
-
-    doc = SimpleDocTemplate(
-        str(path),
-        pagesize=A4,
-        leftMargin=2*cm, rightMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm
-    )
-
-    def inline_markup(s: str) -> str:
-        s = xml_escape(s)
-        s = re.sub(r"\*\*([^*]+)\*\*", r"<b>\1</b>", s)
-        s = re.sub(r"(?<!\*)\*([^*]+)\*(?!\*)", r"<i>\1</i>", s)
-        s = s.replace("\n", "<br/>")
-        return s
-
     def is_list_block(lines):
         stripped_lines = [ln for ln in lines if ln.strip()]
         if not stripped_lines:
@@ -222,7 +451,7 @@ def save_pdf(text: str, path: Path) -> None:
         ok = True
         for ln in stripped_lines:
             s = ln.strip()
-            if not (s.startswith("-") or s.startswith("*") or re.match(r"\d+\.", s)):
+            if not (s.startswith("-") or s.startswith("*") or _NUMBERED_RE.match(s)):
                 ok = False
                 break
         return ok
@@ -231,87 +460,73 @@ def save_pdf(text: str, path: Path) -> None:
         candidates = [ln for ln in lines if '|' in ln]
         return len(candidates) >= max(2, int(0.6 * len([ln for ln in lines if ln.strip()])))
 
-    def table_from_lines(lines):
+    def table_rows(lines):
         rows = []
         for ln in lines:
             if '|' not in ln:
                 continue
             parts = [c.strip() for c in ln.split('|')]
             rows.append(parts)
-        if not rows:
-            return None
-        tbl = Table(rows, hAlign='LEFT')
-        style = TableStyle([
-            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-            ('BACKGROUND', (0,0), (-1,0), colors.whitesmoke),
-            ('GRID', (0,0), (-1,-1), 0.25, colors.grey),
-            ('VALIGN', (0,0), (-1,-1), 'TOP'),
-            ('LEFTPADDING', (0,0), (-1,-1), 6),
-            ('RIGHTPADDING', (0,0), (-1,-1), 6),
-            ('TOPPADDING', (0,0), (-1,-1), 4),
-            ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-        ])
-        tbl.setStyle(style)
-        return tbl
-
-    story = []
-    blocks = re.split(r"\n\s*\n", text.strip())
-    SHEET_RX = re.compile(r"^=+\s*Sheet:\s*(.+?)\s*=+$", re.I)
-
-    for block in blocks:
+        return rows
+
+    pdf = _PdfCanvas(path)
+    body_size, body_leading = _BODY
+    for block in _iter_blocks(text.strip()):
         b = block.strip()
         if not b:
             continue
         if b == '---':
-            story.append(PageBreak())
+            if pdf.y < pdf.top:
+                pdf.page_break()
             continue
 
         lines = b.split('\n')
 
         # Heading
-        m = re.match(r"^#{1,3}\s+(.+)$", b)
+        m = _HEADING_RE.match(b)
         if m:
             level = b.count("#", 0, b.find(" "))
-            content = inline_markup(m.group(1))
-            story.append(Paragraph(content, [h1, h2, h3][level-1]))
-            story.append(Spacer(1, 8))
+            size, leading = _HEADINGS[level-1]
+            pdf.ensure(leading * 2)
+            pdf.text(m.group(1), size, leading, bold=True)
+            pdf.space(8)
             continue
 
         # Sheet header
-        ms = SHEET_RX.match(b)
+        ms = _SHEET_RX.match(b) if b.startswith("=") else None
         if ms:
-            story.append(Paragraph(inline_markup(ms.group(0)), h2))
-            story.append(Spacer(1, 6))
+            size, leading = _HEADINGS[1]
+            pdf.ensure(leading * 2)
+            pdf.text(ms.group(0), size, leading, bold=True)
+            pdf.space(6)
             continue
 
         # Lists
         if is_list_block(lines):
-            bulletType = "bullet"
-            numbered = all(re.match(r"\d+\.", ln.strip()) for ln in lines if ln.strip())
-            items = [re.sub(r"^(?:\d+\.|[-*])\s*", "", ln.strip()) for ln in lines if ln.strip()]
-            if numbered:
-                bulletType = "1"
-            story.append(ListFlowable([ListItem(Paragraph(inline_markup(it), base)) for it in items], bulletType=bulletType, leftIndent=1*cm))
-            story.append(Spacer(1, 8))
+            numbered = all(_NUMBERED_RE.match(ln.strip()) for ln in lines if ln.strip())
+            items = [_LIST_PREFIX_RE.sub("", ln.strip()) for ln in lines if ln.strip()]
+            for n, it in enumerate(items, 1):
+                pdf.text(it, body_size, body_leading, indent=_LIST_INDENT, label=f"{n}." if numbered else "\u2022")
+            pdf.space(8)
             continue
 
         # Quotes
         if all(ln.strip().startswith(">") for ln in lines if ln.strip()):
             qtxt = "\n".join(ln.lstrip(">").strip() for ln in lines)
-            story.append(Paragraph(inline_markup(qtxt), quote))
-            story.append(Spacer(1, 6))
+            pdf.text(qtxt, body_size, body_leading, indent=1*cm, italic=True, color=_QUOTE_COLOR)
+            pdf.space(6)
             continue
 
         # Table
         if is_table_block(lines):
-            tbl = table_from_lines(lines)
-            if tbl:
-                story.append(tbl)
-                story.append(Spacer(1, 8))
+            rows = table_rows(lines)
+            if rows:
+                pdf.table(rows)
+                pdf.space(8)
                 continue
 
         # Paragraph
-        story.append(Paragraph(inline_markup(b), base))
-        story.append(Spacer(1, 6))
+        pdf.text(b, body_size, body_leading)
+        pdf.space(6)
 
-    doc.build(story)
+    pdf.save()
@@ -1,8 +1,15 @@
 import os
-import base64
-from openai import AzureOpenAI
+import asyncio
+import hashlib
+from collections import OrderedDict
+from io import BytesIO
+import pybase64
+from PIL import Image, ImageOps
+from openai import AsyncAzureOpenAI
 from dotenv import load_dotenv
 
+from app.services._azure import http_client
+
 # Environment variables required:
 #   AZURE_OPENAI_API_KEY
 #   AZURE_OPENAI_ENDPOINT
@@ -19,28 +26,97 @@ if not os.environ.get("AZURE_OPENAI_API_KEY") or not os.environ.get("AZURE_OPENA
         "Missing Azure OpenAI OCR configuration. Set AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_GPT4O_DEPLOYMENT."
     )
 
-client = AzureOpenAI(
+client = AsyncAzureOpenAI(
     api_key=os.environ["AZURE_OPENAI_API_KEY"],
     api_version=API_VERSION,
     azure_endpoint=os.environ["AZURE_OPENAI_ENDPOINT"],
+    http_client=http_client,
 )
 
+# Leading magic bytes -> MIME type for the image formats we accept
+_MAGIC = {
+    b"\xff\xd8": "image/jpeg",
+    b"\x89PNG\r\n\x1a\n": "image/png",
+    b"GIF8": "image/gif",
+}
+
 def _guess_mime(image_bytes: bytes) -> str:
-    if image_bytes.startswith(b"\xff\xd8"):
-        return "image/jpeg"
-    if image_bytes.startswith(b"\x89PNG\r\n\x1a\n"):
-        return "image/png"
-    if image_bytes[:4] == b"GIF8":
-        return "image/gif"
+    head = image_bytes[:8]
+    for sig, mime in _MAGIC.items():
+        if head.startswith(sig):
+            return mime
     return "application/octet-stream"
 
-def extract_text_from_image(image_bytes: bytes) -> str:
+# GPT-4o vision tiles images at 768 px, so pixels beyond this long edge are only upload cost
+MAX_IMAGE_EDGE = 1600
+JPEG_QUALITY = 85
+
+def _shrink_image(image_bytes: bytes) -> tuple[bytes, str]:
+    """Downscale large images and re-encode them compactly before upload.
+    Returns (bytes, mime); the original is kept whenever re-encoding would not make it smaller.
+    """
+    mime = _guess_mime(image_bytes)
+    try:
+        img = Image.open(BytesIO(image_bytes))
+        is_png = img.format == "PNG"
+        oversized = max(img.size) > MAX_IMAGE_EDGE
+        if not oversized and not is_png:
+            return image_bytes, mime
+        # Phone photos carry their rotation in EXIF, which re-encoding would drop
+        img = ImageOps.exif_transpose(img)
+        if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+            # Flatten transparency onto white so dark text stays readable
+            img = img.convert("RGBA")
+            bg = Image.new("RGB", img.size, "white")
+            bg.paste(img, mask=img.getchannel("A"))
+            img = bg
+        elif img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        if oversized:
+            img.thumbnail((MAX_IMAGE_EDGE, MAX_IMAGE_EDGE), Image.LANCZOS)
+
+        out = BytesIO()
+        if is_png:
+            # Keep PNG for crisp text edges, but a 256-colour palette is far smaller
+            img.quantize(256).save(out, format="PNG", optimize=True)
+            new_mime = "image/png"
+        else:
+            img.save(out, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+            new_mime = "image/jpeg"
+    except Exception:
+        # Not something Pillow can decode; send it unchanged
+        return image_bytes, mime
+    data = out.getvalue()
+    if len(data) >= len(image_bytes):
+        return image_bytes, mime
+    return data, new_mime
+
+# Small in-process LRU of OCR results keyed by image digest, so retries and
+# repeated uploads of the same image skip both the encode and the model call
+_OCR_CACHE_SIZE = 64
+_ocr_cache: "OrderedDict[bytes, str]" = OrderedDict()
+
+async def extract_text_from_image(image_bytes: bytes) -> str:
     """
     OCR using Azure OpenAI GPT-4o (vision) via Chat Completions.
     Returns plain text in reading order.
     """
-    mime = _guess_mime(image_bytes)
-    b64 = base64.b64encode(image_bytes).decode("utf-8")
+    digest = hashlib.blake2b(image_bytes, digest_size=20).digest()
+    cached = _ocr_cache.get(digest)
+    if cached is not None:
+        _ocr_cache.move_to_end(digest)
+        return cached
+
+    text = await _ocr(image_bytes)
+    _ocr_cache[digest] = text
+    if len(_ocr_cache) > _OCR_CACHE_SIZE:
+        _ocr_cache.popitem(last=False)
+    return text
+
+async def _ocr(image_bytes: bytes) -> str:
+    image_bytes, mime = await asyncio.to_thread(_shrink_image, image_bytes)
+    # pybase64 uses SIMD-accelerated encoding; output is identical to the stdlib
+    b64 = pybase64.b64encode(image_bytes).decode("ascii")
     data_url = f"data:{mime};base64,{b64}"
 
     messages = [
@@ -60,7 +136,7 @@ def extract_text_from_image(image_bytes: bytes) -> str:
         },
     ]
 
-    resp = client.chat.completions.create(
+    resp = await client.chat.completions.create(
         model=DEPLOYMENT,
         messages=messages,
         temperature=0.0,
@@ -1,7 +1,14 @@
 import os
+import asyncio
+import hashlib
+from pathlib import Path
 from typing import List
+import tiktoken
+from diskcache import Cache
 from dotenv import load_dotenv
-from openai import AzureOpenAI
+from openai import AsyncAzureOpenAI
+
+from app.services._azure import http_client
 
 # Load .env for local dev
 load_dotenv()
@@ -20,42 +27,131 @@ if not os.environ.get("AZURE_OPENAI_API_KEY") or not os.environ.get("AZURE_OPENA
         "Missing Azure OpenAI configuration. Set AZURE_OPENAI_API_KEY, AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_GPT4O_DEPLOYMENT."
     )
 
-client = AzureOpenAI(
+client = AsyncAzureOpenAI(
     api_key=os.environ["AZURE_OPENAI_API_KEY"],
     api_version=API_VERSION,
     azure_endpoint=os.environ["AZURE_OPENAI_ENDPOINT"],
+    http_client=http_client,
 )
 
+# Bump whenever the system prompts change so stale cached translations are not reused
+PROMPT_VERSION = "1"
+
+# On-disk LRU cache of translations, shared by all worker processes.
+# Kept outside app/static so cached text is never served publicly.
+CACHE_DIR = Path(os.environ.get("TRANSLATION_CACHE_DIR", Path(__file__).resolve().parents[1] / ".tcache"))
+_cache = Cache(str(CACHE_DIR), size_limit=512 << 20, eviction_policy="least-recently-used")
+
+# Upper bound on in-flight chat completions per process, to stay within Azure rate limits
+MAX_CONCURRENT_REQUESTS = 8
+_request_slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+# Chunks are sized in GPT-4o tokens. The cap is set by the deployment's output limit,
+# not the 128k context: the English translation of a chunk must fit in one completion.
+# gpt-4o 2024-08-06 and later allow 16384 output tokens; 2024-05-13 allows 4096.
+MAX_OUTPUT_TOKENS = int(os.environ.get("AZURE_OPENAI_MAX_OUTPUT_TOKENS", "16384"))
+MAX_CHUNK_TOKENS = MAX_OUTPUT_TOKENS * 3 // 4  # headroom for English running longer than the French
+
+
+# System messages per translation mode, built once and shared by every request
+_SYSTEM_MESSAGES = {
+    "table": {
+        "role": "system",
+        "content": (
+            "You are a professional translator for tabular data. Translate French into clear, natural English. "
+            "Keep the table structure STRICTLY. Represent each row as pipe-delimited cells: col1 | col2 | col3. "
+            "For Excel with multiple sheets, begin each sheet with an exact header line: '===== Sheet: <Name> ====='. "
+            "Do not add commentary or notes. Do not say the data is encoded. Only output the translated cells."
+        ),
+    },
+    "ocr": {
+        "role": "system",
+        "content": (
+            "You are a professional translator. The input was extracted via OCR and may have noisy line breaks. "
+            "Translate the French text into clear, natural English, preserving layout where reasonable "
+            "(headings, lists, paragraphs). Do NOT add commentary."
+        ),
+    },
+    "document": {
+        "role": "system",
+        "content": (
+            "You are a professional translator. Translate the user's French text into clear, natural English. "
+            "Preserve document structure, paragraph breaks, numbered lists, and headings. Do NOT add commentary."
+        ),
+    },
+}
+
+
+def cache_key(text: str, mode: str = "document") -> str:
+    """Stable hash of (prompt version, mode, text) used as the translation cache key."""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{PROMPT_VERSION}\0{mode}\0".encode("utf-8"))
+    h.update((text or "").encode("utf-8"))
+    return h.hexdigest()
+
+
+_enc: "tiktoken.Encoding | None" = None
+
 
-def _chunk_text(text: str, max_chars: int = 6000) -> List[str]:
+def load_tokenizer() -> None:
+    """Load the GPT-4o tokenizer. Blocking: tiktoken downloads its BPE table on first use
+    (cached in TIKTOKEN_CACHE_DIR), so the app runs this in a worker thread at startup.
+    If it cannot load (e.g. no network), token counts stay estimated from characters."""
+    global _enc
+    try:
+        _enc = tiktoken.encoding_for_model("gpt-4o")
+    except Exception:
+        pass
+
+
+def _count_tokens(text: str) -> int:
+    if _enc is None:
+        # Tokenizer not loaded (yet): French averages ~4 characters per token, so this over-counts
+        return len(text) // 3
+    # disallowed_special=() so user text containing e.g. "<|endoftext|>" is counted, not rejected
+    return len(_enc.encode(text, disallowed_special=()))
+
+
+def _split_in_two(text: str) -> tuple[str, str, str] | None:
+    """Split text roughly in half on paragraph, else line, boundaries.
+    Returns (first, second, separator), or None if it has no boundary to split on."""
+    for sep in ("\n\n", "\n"):
+        pieces = text.split(sep)
+        if len(pieces) > 1:
+            mid = len(pieces) // 2
+            return sep.join(pieces[:mid]), sep.join(pieces[mid:]), sep
+    return None
+
+
+def _chunk_text(text: str, max_tokens: int = MAX_CHUNK_TOKENS) -> List[str]:
     """
-    Naive chunker by characters, splitting on double newlines to avoid
+    Chunker by token count, splitting on double newlines to avoid
     breaking paragraphs or table blocks. For CSV/XLSX 'table mode' the
     extractor inserts blank lines between sections/sheets, so this still works.
     """
     text = text or ""
-    if len(text) <= max_chars:
+    if _count_tokens(text) <= max_tokens:
         return [text]
     parts: List[str] = []
     current: List[str] = []
     current_len = 0
     for block in text.split("\n\n"):
-        # +2 accounts for the two newlines we stripped by splitting
-        block_len = len(block) + 2
-        if current_len + block_len <= max_chars:
+        # +1 approximates the token for the blank line we stripped by splitting
+        block_len = _count_tokens(block) + 1
+        if current_len + block_len <= max_tokens:
             current.append(block)
             current_len += block_len
         else:
             if current:
                 parts.append("\n\n".join(current))
             current = [block]
-            current_len = len(block)
+            current_len = block_len
     if current:
         parts.append("\n\n".join(current))
     return parts
 
 
-def translate_text(french_text: str, mode: str = "document") -> str:
+async def translate_text(french_text: str, mode: str = "document") -> str:
     """
     Translate French -> English using Azure OpenAI GPT-4o.
     mode:
@@ -63,40 +159,48 @@ def translate_text(french_text: str, mode: str = "document") -> str:
       - "table": tabular data (CSV/XLSX) -> keep rows/cells strictly
       - "ocr": OCR’d text from images (noisy line breaks)
     """
-    # Choose a system prompt tuned for the content type
-    if mode == "table":
-        sys_prompt = (
-            "You are a professional translator for tabular data. Translate French into clear, natural English. "
-            "Keep the table structure STRICTLY. Represent each row as pipe-delimited cells: col1 | col2 | col3. "
-            "For Excel with multiple sheets, begin each sheet with an exact header line: '===== Sheet: <Name> ====='. "
-            "Do not add commentary or notes. Do not say the data is encoded. Only output the translated cells."
-        )
-    elif mode == "ocr":
-        sys_prompt = (
-            "You are a professional translator. The input was extracted via OCR and may have noisy line breaks. "
-            "Translate the French text into clear, natural English, preserving layout where reasonable "
-            "(headings, lists, paragraphs). Do NOT add commentary."
-        )
-    else:
-        sys_prompt = (
-            "You are a professional translator. Translate the user's French text into clear, natural English. "
-            "Preserve document structure, paragraph breaks, numbered lists, and headings. Do NOT add commentary."
-        )
-
-    chunks = _chunk_text(french_text)
-    outputs: List[str] = []
-
-    for ch in chunks:
-        messages = [
-            {"role": "system", "content": sys_prompt},
-            {"role": "user", "content": ch},
-        ]
-        resp = client.chat.completions.create(
-            model=DEPLOYMENT,
-            messages=messages,
-            temperature=0.2 if mode != "table" else 0.0,  # be stricter for tables
-        )
-        content = (resp.choices[0].message.content or "").strip()
-        outputs.append(content)
-
-    return "\n\n".join(outputs)
+    # System message tuned for the content type (built once at import)
+    system_message = _SYSTEM_MESSAGES.get(mode, _SYSTEM_MESSAGES["document"])
+
+    doc_key = cache_key(french_text, mode)
+    cached = _cache.get(doc_key)
+    if cached is not None:
+        return cached
+
+    async def translate_chunk(ch: str) -> tuple[str, bool]:
+        # Returns (translation, complete). Only complete translations (finish_reason "stop"
+        # and non-empty) are cached, so a content_filter stop or empty reply is retried next
+        # time. Per-chunk entries let documents that share sections reuse each other's work.
+        chunk_key = cache_key(ch, mode)
+        cached = _cache.get(chunk_key)
+        if cached is not None:
+            return cached, True
+        messages = [system_message, {"role": "user", "content": ch}]
+        async with _request_slots:
+            resp = await client.chat.completions.create(
+                model=DEPLOYMENT,
+                messages=messages,
+                temperature=0.2 if mode != "table" else 0.0,  # be stricter for tables
+            )
+        if resp.choices and resp.choices[0].finish_reason == "length":
+            # Output hit the deployment's token limit: retry the chunk as two smaller halves
+            halves = _split_in_two(ch)
+            if halves is None:
+                raise RuntimeError("Translation truncated: a single paragraph exceeds the model's output limit.")
+            first, second, sep = halves
+            (t1, ok1), (t2, ok2) = await asyncio.gather(translate_chunk(first), translate_chunk(second))
+            content, complete = sep.join((t1, t2)), ok1 and ok2
+        else:
+            content = (resp.choices[0].message.content or "").strip()
+            complete = resp.choices[0].finish_reason == "stop" and bool(content)
+        if complete:
+            _cache.set(chunk_key, content)
+        return content, complete
+
+    # gather() returns results in argument order, so chunk order is preserved
+    results = await asyncio.gather(*(translate_chunk(ch) for ch in _chunk_text(french_text)))
+
+    translated = "\n\n".join(content for content, _ in results)
+    if all(complete for _, complete in results):
+        _cache.set(doc_key, translated)
+    return translated